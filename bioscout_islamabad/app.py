@@ -10,7 +10,7 @@ import logging
 from flask import Flask, render_template, send_from_directory, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
-from config import Config
+from config import CONFIG
 
 # Load environment variables
 load_dotenv()
@@ -33,7 +33,7 @@ def create_app():
     
     # Create Flask app
     app = Flask(__name__, static_folder='static', template_folder='templates')
-    app.config.from_object(Config)
+    app.config.from_mapping(CONFIG.to_flask_config())
     
     # Enable CORS for API endpoints
     CORS(app)
@@ -1,40 +1,52 @@
 import os
+from dataclasses import dataclass, asdict
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-class Config:
+@dataclass(frozen=True, slots=True)
+class _Config:
     """Application configuration settings
     
     This class centralizes all configuration settings for the BioScout application.
-    Environment variables are loaded from a .env file if present.
+    Environment variables are loaded from a .env file if present. A single frozen
+    instance is built at import time and exposed as CONFIG.
     
     Attributes:
-        OPENAI_API_KEY (str): API key for OpenAI services
-        UPLOAD_FOLDER (str): Path for uploaded images
-        ALLOWED_EXTENSIONS (set): Allowed file extensions for uploads
-        MAX_CONTENT_LENGTH (int): Maximum upload size in bytes
+        openai_api_key (str): API key for OpenAI services
+        upload_folder (str): Path for uploaded images
+        allowed_extensions (frozenset): Allowed file extensions for uploads
+        max_content_length (int): Maximum upload size in bytes
     """
-    OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-    INATURALIST_API_TOKEN = os.getenv('INATURALIST_API_TOKEN')
-    UPLOAD_FOLDER = 'static/uploads'
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max upload size
+    openai_api_key: str | None
+    inaturalist_api_token: str | None
+    upload_folder: str = 'static/uploads'
+    allowed_extensions: frozenset = frozenset({'png', 'jpg', 'jpeg', 'gif'})
+    max_content_length: int = 16 * 1024 * 1024  # 16MB max upload size
     
     # Database settings
-    DATABASE_DIR = 'data'
+    database_dir: str = 'data'
     
     # RAG system settings
-    RAG_UPDATE_COOLDOWN = 60  # seconds
+    rag_update_cooldown: int = 60  # seconds
     
     # Map default center coordinates (Islamabad)
-    DEFAULT_MAP_CENTER = [33.6844, 73.0479]
-    DEFAULT_MAP_ZOOM = 12
+    default_map_center: tuple = (33.6844, 73.0479)
+    default_map_zoom: int = 12
     
     # Species classification settings
-    ENABLE_AUTO_IDENTIFICATION = True  # Enable/disable auto-identification
-    MAX_IDENTIFICATION_RESULTS = 3  # Maximum number of identification results to return
+    enable_auto_identification: bool = True  # Enable/disable auto-identification
+    max_identification_results: int = 3  # Maximum number of identification results to return
     
     # iNaturalist API settings
-    INATURALIST_API_BASE_URL = "https://api.inaturalist.org/v1" 
\ No newline at end of file
+    inaturalist_api_base_url: str = "https://api.inaturalist.org/v1"
+    
+    def to_flask_config(self):
+        """Return the settings as the upper-case mapping Flask's app.config expects"""
+        return {name.upper(): value for name, value in asdict(self).items()}
+
+CONFIG = _Config(
+    openai_api_key=os.getenv('OPENAI_API_KEY') or None,
+    inaturalist_api_token=os.getenv('INATURALIST_API_TOKEN')
+)
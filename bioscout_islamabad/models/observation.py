@@ -1,6 +1,10 @@
+from collections import namedtuple
 from datetime import datetime
 from services import data_persistence_service as db_service
 
+# Read-only projection of the observation columns used by the RAG service
+ObservationRecord = namedtuple('ObservationRecord', 'id species location date coords notes')
+
 class Observation:
     def __init__(self, user_id, species_name=None, date_observed=None, location=None, 
                  coordinates=None, image_url=None, notes=None, ai_identification=None, 
@@ -99,6 +103,24 @@ class Observation:
         """Find observations by location in CSV."""
         return db_service.find_observations_by_location(location_name)
     
+    @staticmethod
+    def find_by_species_or_location(terms):
+        """Find observations matching any term by species or location in one pass.
+        
+        Returns ObservationRecord tuples rather than full row dicts.
+        """
+        return [
+            ObservationRecord(
+                id=obs.get('id', ''),
+                species=obs.get('species_name', 'Unknown species'),
+                location=obs.get('location', 'Unknown location'),
+                date=obs.get('date_observed', 'Unknown date'),
+                coords=obs.get('coordinates'),
+                notes=obs.get('notes', '')
+            )
+            for obs in db_service.find_observations_by_species_or_location(terms)
+        ]
+    
     @staticmethod
     def find_by_category(category):
         """Find observations by category (plant or animal)."""
@@ -8,12 +8,12 @@ import uuid
 from werkzeug.utils import secure_filename
 from services.inaturalist_service import inaturalist_service
 from services.image_service import get_exif_data, get_coordinates_from_exif
-from config import Config
+from config import CONFIG
 
 bp = Blueprint('identify', __name__, url_prefix='/api')
 
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in CONFIG.allowed_extensions
 
 @bp.route('/identify', methods=['POST'])
 def identify_species():
@@ -30,7 +30,7 @@ def identify_species():
     
     if file and allowed_file(file.filename):
         # Create upload directory if it doesn't exist
-        upload_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), Config.UPLOAD_FOLDER)
+        upload_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), CONFIG.upload_folder)
         os.makedirs(upload_folder, exist_ok=True)
         
         # Save the uploaded file
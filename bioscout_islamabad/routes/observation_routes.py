@@ -7,7 +7,7 @@ from services.species_identification_service import get_species_from_image
 from services.inaturalist_service import inaturalist_service
 from services.image_service import get_exif_data, get_coordinates_from_exif
 from services.data_persistence_service import is_plant_species
-from config import Config
+from config import CONFIG
 
 # Import the RAG updater service
 try:
@@ -20,7 +20,7 @@ except ImportError:
 bp = Blueprint('observations', __name__, url_prefix='/api/observations')
 
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in CONFIG.allowed_extensions
 
 @bp.route('/', methods=['GET'])
 def get_observations():
@@ -86,7 +86,7 @@ def create_observation():
     
     if file and allowed_file(file.filename):
         # Create upload directory if it doesn't exist
-        upload_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), Config.UPLOAD_FOLDER)
+        upload_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), CONFIG.upload_folder)
         os.makedirs(upload_folder, exist_ok=True)
         
         # Save the uploaded file
@@ -95,7 +95,7 @@ def create_observation():
         file.save(file_path)
         
         # Choose identification method: iNaturalist or legacy
-        use_inaturalist = Config.ENABLE_AUTO_IDENTIFICATION and request.form.get('use_ai', 'true').lower() == 'true'
+        use_inaturalist = CONFIG.enable_auto_identification and request.form.get('use_ai', 'true').lower() == 'true'
         
         if use_inaturalist:
             # Get species identification from iNaturalist
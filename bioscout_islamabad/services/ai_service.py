@@ -9,7 +9,7 @@ import os
 import requests
 import base64
 import logging
-from config import Config
+from config import CONFIG
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -35,7 +35,7 @@ def get_species_from_image(image_path):
             'error': 'Image file not found'
         }
     
-    if not Config.OPENAI_API_KEY:
+    if not CONFIG.openai_api_key:
         logger.error("OpenAI API key is missing")
         return {
             'success': False,
@@ -49,7 +49,7 @@ def get_species_from_image(image_path):
         
         headers = {
             "Content-Type": "application/json",
-            "Authorization": f"Bearer {Config.OPENAI_API_KEY}"
+            "Authorization": f"Bearer {CONFIG.openai_api_key}"
         }
         
         payload = {
@@ -0,0 +1,6 @@
+from functools import lru_cache
+
+@lru_cache(maxsize=1)
+def validate_api_key(api_key):
+    """Check the OpenAI API key once; cached per key so a rotated key is re-checked"""
+    return bool(api_key) and len(api_key) >= 20
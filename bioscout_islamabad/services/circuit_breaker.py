@@ -0,0 +1,101 @@
+import threading
+import time
+
+class CircuitOpen(Exception):
+    """Raised when a call is rejected because the circuit is open"""
+
+class CircuitBreaker:
+    """Closed/open/half-open circuit breaker for calls to an upstream service
+
+    The breaker starts closed and lets calls through. After `fail_threshold`
+    failures it opens and rejects calls with CircuitOpen. Once `reset_after`
+    seconds have passed it goes half-open and lets a single trial call
+    through: success closes the circuit again, failure re-opens it.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, name, fail_threshold=5, reset_after=60):
+        self.name = name
+        self.fail_threshold = fail_threshold
+        self.reset_after = reset_after
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """Current state, moving from open to half-open once the cooldown expires"""
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_after:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def call(self, fn, *args, **kwargs):
+        """Call fn through the breaker, raising CircuitOpen if the circuit is open"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.OPEN or (state == self.HALF_OPEN and self._trial_in_flight):
+                raise CircuitOpen(f"Circuit '{self.name}' is open")
+            if state == self.HALF_OPEN:
+                self._trial_in_flight = True
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            # Also covers interrupts and green-thread timeouts, so a cut-off
+            # half-open trial re-opens the circuit instead of blocking it forever
+            self.record_failure()
+            raise
+
+        self.record_success()
+        return result
+
+    def record_success(self):
+        """Record a successful call"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._failures = 0
+                self._trial_in_flight = False
+            elif self._failures > 0:
+                self._failures -= 1
+
+    def record_failure(self):
+        """Record a failed call, opening the circuit if the threshold is reached"""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.fail_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+class ProviderError(Exception):
+    """Raised by a provider when its upstream call fails"""
+
+class CascadingCircuit:
+    """Ordered chain of providers, each tried in turn until one answers
+
+    Providers expose `invoke(*args, **kwargs)` and signal failure by raising
+    CircuitOpen or ProviderError. A provider whose breaker is open is skipped
+    immediately, so a persistently failing upstream costs no round trip.
+    """
+
+    def __init__(self, providers):
+        self.providers = list(providers)
+
+    def invoke_with_provider(self, *args, **kwargs):
+        """Return (provider, answer) for the first provider that succeeds"""
+        for provider in self.providers:
+            try:
+                return provider, provider.invoke(*args, **kwargs)
+            except (CircuitOpen, ProviderError):
+                continue
+        raise ProviderError("All providers in the chain failed")
@@ -12,13 +12,13 @@ import csv
 import json
 import logging
 from datetime import datetime
-from config import Config
+from config import CONFIG
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 # Base directory for CSV files
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), Config.DATABASE_DIR)
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), CONFIG.database_dir)
 os.makedirs(DATA_DIR, exist_ok=True)
 
 # CSV file paths
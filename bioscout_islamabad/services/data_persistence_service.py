@@ -12,13 +12,13 @@ import csv
 import json
 import logging
 from datetime import datetime
-from config import Config
+from config import CONFIG
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 # Base directory for CSV files
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), Config.DATABASE_DIR)
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), CONFIG.database_dir)
 os.makedirs(DATA_DIR, exist_ok=True)
 
 # CSV file paths
@@ -42,6 +42,23 @@ PLANT_KEYWORDS = [
     'fern', 'grass', 'vine', 'bush', 'conifer', 'oak', 'maple'
 ]
 
+# Incremented on every write so cached query results can be invalidated
+DATA_VERSION = 0
+
+def get_data_version():
+    """
+    Get the current data version.
+    
+    Returns:
+        int: Counter incremented each time an observation or document is saved
+    """
+    return DATA_VERSION
+
+def bump_data_version():
+    """Mark stored data as changed."""
+    global DATA_VERSION
+    DATA_VERSION += 1
+
 # Create files if they don't exist
 def initialize_csv_files():
     """Initialize CSV files with headers if they don't exist."""
@@ -178,6 +195,7 @@ def save_observation(observation_data):
         
         # Save back to CSV
         write_dicts_to_csv(target_file, observations, OBSERVATION_HEADERS)
+        bump_data_version()
         logger.info(f"Saved observation {observation_id} to {target_file}")
         
         return observation_id
@@ -363,6 +381,46 @@ def find_observations_by_location(location_name):
         logger.error(f"Error finding observations by location: {e}")
         return []
 
+def find_observations_by_species_or_location(terms):
+    """
+    Find observations whose species or location matches any of the terms
+    (case-insensitive), reading each CSV file once. As in
+    find_observations_by_species, a term is only matched against species in
+    the file chosen by is_plant_species; locations are matched in both files.
+    
+    Args:
+        terms (list): Species or location names to search for
+        
+    Returns:
+        list: Matching observations, each included once (deduplicated by ID)
+    """
+    terms = [term.lower() for term in terms if term]
+    if not terms:
+        return []
+        
+    try:
+        results = {}
+        
+        plant_terms = [term for term in terms if is_plant_species(term)]
+        animal_terms = [term for term in terms if not is_plant_species(term)]
+        
+        # Search in both files
+        for file_path, species_terms in [(PLANTS_CSV, plant_terms), (ANIMALS_CSV, animal_terms)]:
+            observations = read_csv_to_dicts(file_path, OBSERVATION_HEADERS)
+            
+            for obs in observations:
+                obs_species = obs.get('species_name', '').lower()
+                obs_location = obs.get('location', '').lower()
+                if (any(term in obs_species for term in species_terms)
+                        or any(term in obs_location for term in terms)):
+                    if obs.get('id') not in results:
+                        results[obs.get('id')] = process_coordinates(obs)
+        
+        return list(results.values())
+    except Exception as e:
+        logger.error(f"Error finding observations by species or location: {e}")
+        return []
+
 def find_observations_by_category(category):
     """
     Find observations by category (plant or animal).
@@ -410,6 +468,7 @@ def save_knowledge_document(document_data):
         
         # Save back to CSV
         write_dicts_to_csv(KNOWLEDGE_CSV, documents, KNOWLEDGE_HEADERS)
+        bump_data_version()
         
         return document_id
     except Exception as e:
@@ -11,7 +11,7 @@ from datetime import datetime, timedelta
 import logging
 import time
 
-from config import Config
+from config import CONFIG
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -31,8 +31,8 @@ class INaturalistService:
         Args:
             api_token (str, optional): iNaturalist API token
         """
-        self.base_url = Config.INATURALIST_API_BASE_URL
-        self.api_token = api_token or Config.INATURALIST_API_TOKEN
+        self.base_url = CONFIG.inaturalist_api_base_url
+        self.api_token = api_token or CONFIG.inaturalist_api_token
         self.jwt_token = None
         self.jwt_expiry = None
         self.rate_limit_remaining = 100  # Default to 100 requests
@@ -232,7 +232,7 @@ class INaturalistService:
             Dict: Formatted identification data
         """
         if limit is None:
-            limit = Config.MAX_IDENTIFICATION_RESULTS
+            limit = CONFIG.max_identification_results
             
         if not results:
             return {
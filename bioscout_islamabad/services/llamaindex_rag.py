@@ -34,7 +34,7 @@ if NUMPY_AVAILABLE:
         print(f"Error initializing LlamaIndex: {e}")
         print("Run the fix_numpy.py script to resolve compatibility issues.")
 
-from config import Config
+from config import CONFIG
 from models.observation import Observation
 
 # Configure knowledge base directories
@@ -58,8 +58,8 @@ def initialize_index():
     
     try:
         # Configure LLM and embedding model
-        llm = OpenAI(model="gpt-4", api_key=Config.OPENAI_API_KEY)
-        embed_model = OpenAIEmbedding(api_key=Config.OPENAI_API_KEY)
+        llm = OpenAI(model="gpt-4", api_key=CONFIG.openai_api_key)
+        embed_model = OpenAIEmbedding(api_key=CONFIG.openai_api_key)
         
         # Set up global settings
         Settings.llm = llm
@@ -346,7 +346,7 @@ def extract_key_terms(query):
 def fallback_response(query, observations):
     """Generate a fallback response using direct OpenAI call with observations only"""
     try:
-        client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
+        client = openai.OpenAI(api_key=CONFIG.openai_api_key)
         
         # Create a simple context from observations
         context = "Based on our records:\n"
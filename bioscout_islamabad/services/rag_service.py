@@ -2,7 +2,7 @@ import os
 import openai
 from models.knowledge_base import KnowledgeDocument
 from models.observation import Observation
-from config import Config
+from config import CONFIG
 
 def process_query(query):
     """Process user query using RAG system"""
@@ -77,7 +77,7 @@ def build_context(knowledge_docs, observations):
 
 def generate_response(query, context):
     """Generate response using OpenAI with context"""
-    api_key = Config.OPENAI_API_KEY
+    api_key = CONFIG.openai_api_key
     
     try:
         client = openai.OpenAI(api_key=api_key)
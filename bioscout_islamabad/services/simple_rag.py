@@ -7,7 +7,7 @@ import os
 import json
 import openai
 from typing import List, Dict
-from config import Config
+from config import CONFIG
 from models.observation import Observation
 
 # Configure knowledge base directories
@@ -239,7 +239,7 @@ def process_query(query_text: str) -> Dict:
             context = "No specific information found in our knowledge base."
         
         # Generate response using OpenAI
-        client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
+        client = openai.OpenAI(api_key=CONFIG.openai_api_key)
         
         response = client.chat.completions.create(
             model="gpt-3.5-turbo",
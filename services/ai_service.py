@@ -1,32 +1,76 @@
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import base64
+import re
 import traceback
-from config import Config
+from config import CONFIG
+from services.api_key import validate_api_key
+from services.circuit_breaker import CircuitBreaker, CircuitOpen
 
-# Flag for fallback mode
-USE_FALLBACK_MODE = False
+# orjson encodes the large base64 payload much faster than the stdlib json module
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Shared session so repeated calls reuse a keep-alive connection to the API
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_maxsize=10,
+    max_retries=Retry(
+        total=2,
+        backoff_factor=0.3,
+        status_forcelist=[429, 502, 503, 504],
+        allowed_methods=frozenset(["POST"]),
+        raise_on_status=False
+    )
+))
+
+# One breaker per upstream so a vision outage fails fast without touching chat
+VISION_BREAKER = CircuitBreaker("openai-vision")
+
+# Read size for streaming base64; a multiple of 3 so no chunk is padded mid-stream
+_BASE64_CHUNK_SIZE = 57 * 1024
+
+def _encode_image_base64(image_path):
+    """Base64-encode an image file chunk by chunk, without holding the raw bytes in memory"""
+    encoded = bytearray()
+    with open(image_path, "rb") as image_file:
+        while chunk := image_file.read(_BASE64_CHUNK_SIZE):
+            encoded += base64.b64encode(chunk)
+    return encoded.decode('ascii')
+
+def _request_identification(headers, payload):
+    """Send the vision request and return the model's answer, raising on API errors"""
+    url = "https://api.openai.com/v1/chat/completions"
+    if ORJSON_AVAILABLE:
+        response = _SESSION.post(url, headers=headers, data=orjson.dumps(payload), timeout=(3, 30))
+    else:
+        response = _SESSION.post(url, headers=headers, json=payload, timeout=(3, 30))
+    response_data = response.json()
+    
+    if 'choices' not in response_data:
+        raise RuntimeError(f"API error response: {response_data}")
+    return response_data['choices'][0]['message']['content']
 
 def get_species_from_image(image_path):
     """Identify species in an image using GPT-4 Vision API"""
-    global USE_FALLBACK_MODE
-    
-    # If we already know we're in fallback mode, don't attempt API call
-    if USE_FALLBACK_MODE:
-        return generate_fallback_identification(image_path)
-    
-    api_key = Config.OPENAI_API_KEY
+    api_key = CONFIG.openai_api_key
     
     # Basic API key validation check
-    if "None" in api_key or not api_key or len(api_key) < 20:
+    if not validate_api_key(api_key):
         print("Invalid API key detected. Using fallback mode for image identification.")
-        USE_FALLBACK_MODE = True
+        return generate_fallback_identification(image_path)
+    
+    # Skip reading and encoding the image while the vision API is known to be down
+    if VISION_BREAKER.state == CircuitBreaker.OPEN:
         return generate_fallback_identification(image_path)
     
     try:
-        # Read image and convert to base64
-        with open(image_path, "rb") as image_file:
-            base64_image = base64.b64encode(image_file.read()).decode('utf-8')
+        base64_image = _encode_image_base64(image_path)
         
         headers = {
             "Content-Type": "application/json",
@@ -55,91 +99,90 @@ def get_species_from_image(image_path):
             "max_tokens": 300
         }
         
-        response = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=payload)
-        response_data = response.json()
-        
-        if 'choices' in response_data:
-            result = response_data['choices'][0]['message']['content']
-            return {
-                'success': True,
-                'result': result,
-                'species': extract_species_from_result(result)
-            }
-        else:
-            print(f"API error response: {response_data}")
-            USE_FALLBACK_MODE = True
-            return generate_fallback_identification(image_path)
+        result = VISION_BREAKER.call(_request_identification, headers, payload)
+        return {
+            'success': True,
+            'result': result,
+            'species': extract_species_from_result(result)
+        }
     
+    except CircuitOpen:
+        return generate_fallback_identification(image_path)
     except Exception as e:
         print(f"Error in image identification: {e}")
         traceback.print_exc()
-        USE_FALLBACK_MODE = True
         return generate_fallback_identification(image_path)
 
+# List of common wildlife in Islamabad that we might detect
+COMMON_WILDLIFE = {
+    'leopard': {
+        'name': 'Common Leopard',
+        'scientific': 'Panthera pardus',
+        'category': 'Mammal'
+    },
+    'deer': {
+        'name': 'Barking Deer',
+        'scientific': 'Muntiacus muntjak',
+        'category': 'Mammal'
+    },
+    'fox': {
+        'name': 'Red Fox',
+        'scientific': 'Vulpes vulpes',
+        'category': 'Mammal'
+    },
+    'bird': {
+        'name': 'Himalayan Griffon',
+        'scientific': 'Gyps himalayensis',
+        'category': 'Bird'
+    },
+    'eagle': {
+        'name': 'Steppe Eagle',
+        'scientific': 'Aquila nipalensis',
+        'category': 'Bird'
+    },
+    'duck': {
+        'name': 'Mallard Duck',
+        'scientific': 'Anas platyrhynchos',
+        'category': 'Bird'
+    },
+    'snake': {
+        'name': 'Indian Cobra',
+        'scientific': 'Naja naja',
+        'category': 'Reptile'
+    }
+}
+
+# Optional upload prefix up to the first underscore, the stem, then the extension
+_FILENAME_RE = re.compile(r"^(?:[^_]*_)?(.*?)(?:\.[^.]*)?$", re.DOTALL)
+
+# Keywords compiled once so a filename is matched in a single scan
+_WILDLIFE_KEYWORDS_RE = re.compile("|".join(re.escape(keyword) for keyword in COMMON_WILDLIFE))
+
+# Table order decides between several keywords in one filename
+_WILDLIFE_PRIORITY = {keyword: index for index, keyword in enumerate(COMMON_WILDLIFE)}
+
 def generate_fallback_identification(image_path):
     """Generate a fallback identification when API is not available"""
-    # Extract filename as a basic way to guess the species
-    filename = os.path.basename(image_path).lower()
-    
-    # Remove random prefix if there is one (like UUID_)
-    if '_' in filename:
-        parts = filename.split('_', 1)
-        if len(parts) > 1:
-            filename = parts[1]
-    
-    # Remove file extension
-    filename = os.path.splitext(filename)[0]
-    
-    # List of common wildlife in Islamabad that we might detect
-    common_wildlife = {
-        'leopard': {
-            'name': 'Common Leopard',
-            'scientific': 'Panthera pardus',
-            'category': 'Mammal'
-        },
-        'deer': {
-            'name': 'Barking Deer',
-            'scientific': 'Muntiacus muntjak',
-            'category': 'Mammal'
-        },
-        'fox': {
-            'name': 'Red Fox',
-            'scientific': 'Vulpes vulpes',
-            'category': 'Mammal'
-        },
-        'bird': {
-            'name': 'Himalayan Griffon',
-            'scientific': 'Gyps himalayensis',
-            'category': 'Bird'
-        },
-        'eagle': {
-            'name': 'Steppe Eagle',
-            'scientific': 'Aquila nipalensis',
-            'category': 'Bird'
-        },
-        'duck': {
-            'name': 'Mallard Duck',
-            'scientific': 'Anas platyrhynchos',
-            'category': 'Bird'
-        },
-        'snake': {
-            'name': 'Indian Cobra',
-            'scientific': 'Naja naja',
-            'category': 'Reptile'
-        }
-    }
+    # Extract filename as a basic way to guess the species, without the
+    # random upload prefix (like UUID_) or the file extension
+    filename = _FILENAME_RE.match(os.path.basename(image_path)).group(1).lower()
     
     # Check if filename contains any of our known species
-    for keyword, info in common_wildlife.items():
-        if keyword in filename:
-            return {
-                'success': True,
-                'result': f"This appears to be a {info['name']} ({info['scientific']}), which is a {info['category']} found in Islamabad, Pakistan. (Note: This is an offline identification)",
-                'species': {
-                    'name': info['name'],
-                    'confidence': 0.7
-                }
+    keyword = min(
+        (match.group(0) for match in _WILDLIFE_KEYWORDS_RE.finditer(filename)),
+        key=_WILDLIFE_PRIORITY.get,
+        default=None
+    )
+    if keyword:
+        info = COMMON_WILDLIFE[keyword]
+        return {
+            'success': True,
+            'result': f"This appears to be a {info['name']} ({info['scientific']}), which is a {info['category']} found in Islamabad, Pakistan. (Note: This is an offline identification)",
+            'species': {
+                'name': info['name'],
+                'confidence': 0.7
             }
+        }
     
     # Default fallback response
     return {
@@ -151,24 +194,33 @@ def generate_fallback_identification(image_path):
         }
     }
 
+# Confidence phrases checked in order; the first one found wins
+_CONFIDENCE_MAP = [
+    ("high confidence", 0.9),
+    ("medium confidence", 0.7),
+    ("low confidence", 0.5)
+]
+
 def extract_species_from_result(result_text):
     """Extract species name and confidence from GPT response"""
     # Simple extraction logic - would need enhancement for production
-    if "identified as" in result_text.lower():
-        species_part = result_text.lower().split("identified as")[1].strip()
+    result_lower = result_text.lower()
+    if "identified as" in result_lower:
+        species_part = result_lower.split("identified as")[1].strip()
         species_name = species_part.split(".")[0].strip()
         return {
             'name': species_name,
-            'confidence': get_confidence_from_text(result_text)
+            'confidence': _confidence(result_lower)
         }
     return None
 
 def get_confidence_from_text(text):
     """Extract confidence level from GPT response"""
-    if "high confidence" in text.lower():
-        return 0.9
-    elif "medium confidence" in text.lower():
-        return 0.7
-    elif "low confidence" in text.lower():
-        return 0.5
-    return 0.6  # Default moderate confidence 
\ No newline at end of file
+    return _confidence(text.lower())
+
+def _confidence(text_lower):
+    """Confidence level for already-lowercased response text"""
+    for phrase, confidence in _CONFIDENCE_MAP:
+        if phrase in text_lower:
+            return confidence
+    return 0.6  # Default moderate confidence
@@ -1,43 +1,98 @@
 import os
 import openai
 import json
+import re
+import copy
+import threading
 import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from models.knowledge_base import KnowledgeDocument
 from models.observation import Observation
-from config import Config
+from config import CONFIG
+from services import data_persistence_service as db_service
+from services.api_key import validate_api_key
+from services.circuit_breaker import CascadingCircuit, CircuitBreaker, CircuitOpen, ProviderError
 
-# Check if we're in fallback mode (no valid API key)
-USE_FALLBACK_MODE = False
+# This is a simplified implementation - in production would use NER or similar
+# Known locations in Islamabad
+LOCATIONS = ["margalla hills", "rawal lake", "shakarparian", "daman-e-koh", 
+             "pir sohawa", "trail", "islamabad"]
+
+# Animal categories
+CATEGORIES = ["bird", "birds", "mammal", "mammals", "reptile", "reptiles", 
+              "amphibian", "amphibians", "fish"]
+
+# All key terms compiled into one alternation, longest first so "birds" beats "bird".
+# Terms are anchored on word boundaries so "bird" does not match inside "birdsong"
+_KEY_TERMS_RE = re.compile(r"\b(" + "|".join(
+    re.escape(term) for term in sorted(LOCATIONS + CATEGORIES, key=len, reverse=True)
+) + r")\b")
+
+# Every known term contained in each term, itself included, so a match on
+# "birds" also reports "bird" the way the original per-term substring scan did
+_CONTAINED_TERMS = {
+    term: [other for other in LOCATIONS + CATEGORIES if other in term]
+    for term in LOCATIONS + CATEGORIES
+}
+
+# Queries shorter than the shortest term cannot contain any of them
+_MIN_KEY_TERM_LENGTH = min(len(term) for term in LOCATIONS + CATEGORIES)
+
+# Shared pool for the independent retrieval lookups in process_query
+_RETRIEVAL_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="rag-retrieval")
+
+# Memoized process_query results keyed by (normalized query, data version)
+_QUERY_CACHE = OrderedDict()
+_QUERY_CACHE_SIZE = 512
+_QUERY_CACHE_LOCK = threading.Lock()
 
 def process_query(query):
     """Process user query using RAG system"""
     try:
+        cache_key = (query.strip().lower(), db_service.get_data_version())
+        with _QUERY_CACHE_LOCK:
+            cached = _QUERY_CACHE.get(cache_key)
+            if cached is not None:
+                _QUERY_CACHE.move_to_end(cache_key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
         # Step 1: Retrieve relevant documents from knowledge base
-        knowledge_results = KnowledgeDocument.search(query)
+        # (runs on the retrieval pool while observations are looked up below)
+        knowledge_future = _RETRIEVAL_EXECUTOR.submit(KnowledgeDocument.search, query)
         
         # Step 2: Retrieve relevant observations
-        observation_results = []
         # Extract potential species or location names from query
         key_terms = extract_key_terms(query)
         
-        for term in key_terms:
-            species_observations = Observation.find_by_species(term)
-            location_observations = Observation.find_by_location(term)
-            observation_results.extend(species_observations)
-            observation_results.extend(location_observations)
+        # One lookup for all terms; an observation matching several terms
+        # (e.g. a bird seen at Margalla) is only included once
+        observation_results = Observation.find_by_species_or_location(key_terms)
+        knowledge_results = knowledge_future.result()
         
         # Step 3: Build context from retrieved information
         context = build_context(knowledge_results, observation_results)
         
         # Step 4: Generate response using OpenAI or fallback
-        response = generate_response(query, context)
+        response, from_model = _generate_response(query, context)
         
-        return {
+        result = {
             'response': response,
             'knowledge_sources': [doc['title'] for doc in knowledge_results],
             'observation_count': len(observation_results),
             'observations': format_observations(observation_results)
         }
+        
+        # Offline answers are not cached so they are replaced once OpenAI recovers
+        if from_model:
+            with _QUERY_CACHE_LOCK:
+                _QUERY_CACHE[cache_key] = result
+                if len(_QUERY_CACHE) > _QUERY_CACHE_SIZE:
+                    _QUERY_CACHE.popitem(last=False)
+            return copy.deepcopy(result)
+        return result
     except Exception as e:
         print(f"Error in process_query: {e}")
         traceback.print_exc()
@@ -50,93 +105,92 @@ def process_query(query):
 
 def extract_key_terms(query):
     """Extract potential species or location names from query"""
-    # This is a simplified implementation - in production would use NER or similar
-    # Known locations in Islamabad
-    locations = ["margalla hills", "rawal lake", "shakarparian", "daman-e-koh", 
-                 "pir sohawa", "trail", "islamabad"]
-    
-    # Animal categories
-    categories = ["bird", "birds", "mammal", "mammals", "reptile", "reptiles", 
-                  "amphibian", "amphibians", "fish"]
-    
-    terms = []
-    query_lower = query.lower()
+    if len(query) < _MIN_KEY_TERM_LENGTH:
+        return []
     
-    # Check for locations
-    for location in locations:
-        if location in query_lower:
-            terms.append(location)
+    # Single pass over the query, expanding each match to the terms it contains
+    found = set()
+    for match in _KEY_TERMS_RE.findall(query.lower()):
+        found.update(_CONTAINED_TERMS[match])
     
-    # Check for categories
-    for category in categories:
-        if category in query_lower:
-            terms.append(category)
-    
-    return terms
+    # Report locations first, then categories, in vocabulary order
+    return [term for term in LOCATIONS + CATEGORIES if term in found]
 
 def build_context(knowledge_docs, observations):
-    """Build context from retrieved documents and observations"""
-    context = "Knowledge Base Information:\n"
+    """Build context from retrieved documents and observations
+    
+    Returns a dict with the prose sent to the model plus the species and
+    lowercased locations of the included observations as parallel tuples,
+    so the offline fallback does not have to re-parse the prose.
+    """
+    kb_sig = tuple(
+        (doc['title'], doc['source'], doc['content'][:300])
+        for doc in knowledge_docs[:3]  # Limit to top 3 most relevant documents
+    )
+    obs_sig = tuple(
+        (obs.species, obs.location, obs.date)
+        for obs in observations[:5]  # Limit to 5 most recent observations
+    )
+    prose, species, locations_lower = _build_context_cached(kb_sig, obs_sig)
+    return {
+        'prose': prose,
+        'species': species,
+        'locations_lower': locations_lower
+    }
+
+@lru_cache(maxsize=256)
+def _build_context_cached(kb_sig, obs_sig):
+    """Format the context for a (documents, observations) signature; memoized"""
+    prose = "Knowledge Base Information:\n"
     
-    for doc in knowledge_docs[:3]:  # Limit to top 3 most relevant documents
-        context += f"- {doc['title']} ({doc['source']}): {doc['content'][:300]}...\n\n"
+    for title, source, preview in kb_sig:
+        prose += f"- {title} ({source}): {preview}...\n\n"
     
-    context += "\nRecent Observations:\n"
-    for obs in observations[:5]:  # Limit to 5 most recent observations
-        species = obs.get('species_name', 'Unknown species')
-        location = obs.get('location', 'Unknown location')
-        date = obs.get('date_observed', 'Unknown date')
-        context += f"- {species} observed at {location} on {date}\n"
+    prose += "\nRecent Observations:\n"
+    for species, location, date in obs_sig:
+        prose += f"- {species} observed at {location} on {date}\n"
     
-    return context
+    species_names = tuple(entry[0] for entry in obs_sig)
+    locations_lower = tuple(str(entry[1]).lower() for entry in obs_sig)
+    return prose, species_names, locations_lower
+
+def _bird_handler(species, locations):
+    bird_species = [s for s in species if "bird" in s.lower() or "duck" in s.lower() or "eagle" in s.lower()]
+    if bird_species:
+        return f"Based on our records, the following bird species have been observed in Islamabad: {', '.join(bird_species)}."
+    return "I don't have specific information about birds in that area from our records."
+
+def _margalla_handler(species, locations):
+    margalla_species = [s for s, loc in zip(species, locations) if "margalla" in loc]
+    if margalla_species:
+        return f"In Margalla Hills, these species have been recorded: {', '.join(margalla_species)}."
+    return "Margalla Hills is known for its biodiversity, but I don't have specific observations in our current records."
+
+def _lake_handler(species, locations):
+    lake_species = [s for s, loc in zip(species, locations) if "rawal" in loc]
+    if lake_species:
+        return f"At Rawal Lake, these species have been observed: {', '.join(lake_species)}."
+    return "Rawal Lake is home to various species, but I don't have specific observations in our current records."
+
+# Offline answer routes, checked in order; the first matching pattern wins
+FALLBACK_ROUTES = [
+    (re.compile(r"\bbirds?\b"), _bird_handler),
+    (re.compile(r"\bmargalla\b"), _margalla_handler),
+    (re.compile(r"\b(rawal|lake)\b"), _lake_handler)
+]
 
 def generate_fallback_response(query, context):
     """Generate a fallback response based on the context without using OpenAI API"""
-    global USE_FALLBACK_MODE
-    USE_FALLBACK_MODE = True
-    
     # Basic keyword matching for fallback responses
     query_lower = query.lower()
     
-    # Extract key information from context
-    species_mentioned = []
-    locations_mentioned = []
-    for line in context.split('\n'):
-        if line.startswith('- ') and 'observed at' in line:
-            species = line.split('observed at')[0].replace('- ', '').strip()
-            location = line.split('observed at')[1].split('on')[0].strip()
-            species_mentioned.append(species)
-            locations_mentioned.append(location)
+    species_mentioned = context['species']
+    locations_mentioned = context['locations_lower']
     
     # Build a simple response based on the query and available information
-    if "bird" in query_lower or "birds" in query_lower:
-        bird_species = [s for s in species_mentioned if "bird" in s.lower() or "duck" in s.lower() or "eagle" in s.lower()]
-        if bird_species:
-            return f"Based on our records, the following bird species have been observed in Islamabad: {', '.join(bird_species)}."
-        else:
-            return "I don't have specific information about birds in that area from our records."
-    
-    if "margalla" in query_lower:
-        margalla_species = []
-        for i, loc in enumerate(locations_mentioned):
-            if "margalla" in loc.lower() and i < len(species_mentioned):
-                margalla_species.append(species_mentioned[i])
-        
-        if margalla_species:
-            return f"In Margalla Hills, these species have been recorded: {', '.join(margalla_species)}."
-        else:
-            return "Margalla Hills is known for its biodiversity, but I don't have specific observations in our current records."
-    
-    if "rawal" in query_lower or "lake" in query_lower:
-        lake_species = []
-        for i, loc in enumerate(locations_mentioned):
-            if "rawal" in loc.lower() and i < len(species_mentioned):
-                lake_species.append(species_mentioned[i])
-        
-        if lake_species:
-            return f"At Rawal Lake, these species have been observed: {', '.join(lake_species)}."
-        else:
-            return "Rawal Lake is home to various species, but I don't have specific observations in our current records."
+    for pattern, handler in FALLBACK_ROUTES:
+        if pattern.search(query_lower):
+            return handler(species_mentioned, locations_mentioned)
     
     # Default response if no specific matches
     if species_mentioned:
@@ -144,91 +198,96 @@ def generate_fallback_response(query, context):
     else:
         return "I don't have specific information about that in our current records. You can try asking about birds, mammals, or specific locations like Margalla Hills or Rawal Lake."
 
-def generate_response(query, context):
-    """Generate response using OpenAI with context"""
-    global USE_FALLBACK_MODE
+SYSTEM_TEMPLATE = """You are a biodiversity expert specialized in the flora and fauna of Islamabad, Pakistan.
+Answer questions based on the following context. If you don't know the answer based on the context, say so politely.
+
+Context:
+{context}"""
+
+def _build_messages(query, context):
+    """Build the chat messages shared by every model in the chain"""
+    return [
+        {"role": "system", "content": SYSTEM_TEMPLATE.format(context=context['prose'])},
+        {"role": "user", "content": query}
+    ]
+
+class ChatModelProvider:
+    """OpenAI chat model guarded by its own circuit breaker"""
     
-    # First, check if we're already in fallback mode
-    if USE_FALLBACK_MODE:
-        return generate_fallback_response(query, context)
+    def __init__(self, model):
+        self.model = model
+        self.breaker = CircuitBreaker(model)
     
+    def invoke(self, query, context, messages):
+        try:
+            response = self.breaker.call(
+                openai.chat.completions.create,
+                model=self.model,
+                messages=messages,
+                max_tokens=500
+            )
+        except CircuitOpen:
+            raise
+        except Exception as e:
+            print(f"Error with {self.model}: {e}")
+            raise ProviderError(self.model) from e
+        return response.choices[0].message.content
+
+class OfflineFallback:
+    """Last link in the chain; answers from the context without any API call"""
+    
+    def invoke(self, query, context, messages):
+        return generate_fallback_response(query, context)
+
+# GPT-4 Turbo, then GPT-3.5, then offline answers
+CHAIN = CascadingCircuit([
+    ChatModelProvider("gpt-4-1106-preview"),
+    ChatModelProvider("gpt-3.5-turbo"),
+    OfflineFallback()
+])
+
+def generate_response(query, context):
+    """Generate response using OpenAI with context"""
+    return _generate_response(query, context)[0]
+
+def _generate_response(query, context):
+    """Generate a response, also reporting whether it came from an OpenAI model"""
     # Try to use OpenAI
-    api_key = Config.OPENAI_API_KEY
+    api_key = CONFIG.openai_api_key
     
     # Basic API key validation check
-    if "None" in api_key or not api_key or len(api_key) < 20:
+    if not validate_api_key(api_key):
         print("Invalid API key detected. Using fallback mode.")
-        return generate_fallback_response(query, context)
+        return generate_fallback_response(query, context), False
     
     try:
         # Set up OpenAI with the API key
         openai.api_key = api_key
         
-        # First try with the Turbo model
-        try:
-            response = openai.chat.completions.create(
-                model="gpt-4-1106-preview",  # GPT-4 Turbo
-                messages=[
-                    {"role": "system", "content": f"""You are a biodiversity expert specialized in the flora and fauna of Islamabad, Pakistan. 
-                    Answer questions based on the following context. If you don't know the answer based on the context, say so politely.
-                    
-                    Context:
-                    {context}"""},
-                    {"role": "user", "content": query}
-                ],
-                max_tokens=500
-            )
-            return response.choices[0].message.content
-        except Exception as model_error:
-            print(f"Error with gpt-4-1106-preview: {model_error}")
-            
-            # Fallback to gpt-3.5-turbo if GPT-4 Turbo fails
-            try:
-                response = openai.chat.completions.create(
-                    model="gpt-3.5-turbo",  # Fallback to GPT-3.5
-                    messages=[
-                        {"role": "system", "content": f"""You are a biodiversity expert specialized in the flora and fauna of Islamabad, Pakistan. 
-                        Answer questions based on the following context. If you don't know the answer based on the context, say so politely.
-                        
-                        Context:
-                        {context}"""},
-                        {"role": "user", "content": query}
-                    ],
-                    max_tokens=500
-                )
-                return response.choices[0].message.content
-            except Exception as fallback_error:
-                print(f"Error with fallback model gpt-3.5-turbo: {fallback_error}")
-                USE_FALLBACK_MODE = True
-                return generate_fallback_response(query, context)
-                
+        # Built once and reused by every model in the chain
+        messages = _build_messages(query, context)
+        provider, response = CHAIN.invoke_with_provider(query, context, messages)
+        return response, not isinstance(provider, OfflineFallback)
     except Exception as e:
         print(f"Error generating response: {e}")
         print(f"API Key (first 5 chars): {api_key[:5]}...")
         traceback.print_exc()
-        USE_FALLBACK_MODE = True
-        return generate_fallback_response(query, context)
+        return generate_fallback_response(query, context), False
 
 def format_observations(observations):
     """Format observations for map display"""
-    formatted = []
-    for obs in observations:
-        if 'coordinates' in obs and obs['coordinates']:
-            try:
-                formatted.append({
-                    'type': 'Feature',
-                    'geometry': {
-                        'type': 'Point',
-                        'coordinates': obs['coordinates']
-                    },
-                    'properties': {
-                        'id': str(obs.get('id', '')),
-                        'species': obs.get('species_name', 'Unknown'),
-                        'date': obs.get('date_observed', ''),
-                        'location': obs.get('location', ''),
-                        'notes': obs.get('notes', '')
-                    }
-                })
-            except Exception as e:
-                print(f"Error formatting observation: {e}")
-    return formatted 
\ No newline at end of file
+    # Observations without coordinates can't be placed on the map
+    return [
+        {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': obs.coords},
+            'properties': {
+                'id': str(obs.id),
+                'species': obs.species,
+                'date': obs.date,
+                'location': obs.location,
+                'notes': obs.notes
+            }
+        }
+        for obs in observations if obs.coords
+    ]